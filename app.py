@@ -16,196 +16,256 @@ calculation tool.
 """
 
 import datetime
+from typing import Tuple
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
 from models import PensionInputs
 from pension_calculator import (
-    simulate_until_pension_age,
-    annual_pension_from_balance,
+    simulate_multi,
+    validate_pension_age,
+    annual_pension_batch,
 )
 
-st.set_page_config(page_title="Pensjonssimulator – POC", layout="wide")
 
-st.title("🧮 Pensjonssimulator – POC")
+@st.cache_data(ttl=None, max_entries=128)
+def compute_results(
+    inputs: PensionInputs,
+    work_until_age: int,
+    pension_ages: Tuple[int, ...],
+) -> pd.DataFrame:
+    """
+    Beregner resultattabellen for gitte input og pensjonsaldre.
+
+    Resultatet caches av Streamlit, slik at omkjøringer der input ikke er
+    endret (f.eks. ved andre widget-endringer) ikke beregner alt på nytt.
+
+    Args:
+        inputs: Input-parametere (frossen dataclass, brukes direkte som cache-nøkkel)
+        work_until_age: Alder personen slutter å jobbe
+        pension_ages: Gyldige pensjonsaldre som skal beregnes
+    """
+
+    balances = simulate_multi(
+        inputs=inputs,
+        work_until_age=work_until_age,
+        pension_ages=pension_ages,
+    )
 
-st.markdown("""
-En **forenklet** modell for å se hvordan:
-- lønn i G  
-- hvor lenge du jobber  
-- årlig sparing og avkastning  
+    pa_arr = np.asarray(pension_ages, dtype=np.int64)
+    # Én rad per pensjonsalder: (folketrygd, otp, savings)
+    balance_arr = np.array([balances[pa] for pa in pension_ages], dtype=float).reshape(-1, 3)
+    folketrygd_arr, otp_arr, savings_arr = balance_arr.T
 
-…påvirker pensjon ved ulike aldre.
+    nav_arr = annual_pension_batch(folketrygd_arr, pa_arr, inputs.life_expectancy, use_nav_style=True)
+    # OTP er ikke NAV, så vi bruker enkel modell
+    otp_annual_arr = annual_pension_batch(otp_arr, pa_arr, inputs.life_expectancy, use_nav_style=False)
+    sav_arr = annual_pension_batch(savings_arr, pa_arr, inputs.life_expectancy, use_nav_style=False)
 
-🔎 Modellen bruker:
-- NAV-lignende opptjening i folketrygden (18 % opp til 7,1 G)
-- NAV-lignende **levealdersjustering** med delingsfaktor ved 62–67 år
-- Forenklet modell for 68–75 år
-- Forenklet modell for OTP og egen sparing
+    return pd.DataFrame({
+        "Pensjonsalder": pa_arr,
+        "Jobber til": np.full_like(pa_arr, work_until_age),
+        "Lønn i G": np.full(pa_arr.shape, inputs.salary_in_g),
+        "Årlig NAV (modell m/levealdersjustering)": np.rint(nav_arr).astype(np.int64),
+        "Årlig OTP (modell)": np.rint(otp_annual_arr).astype(np.int64),
+        "Årlig fra sparing": np.rint(sav_arr).astype(np.int64),
+        "SUM årlig (modell)": np.rint(nav_arr + otp_annual_arr + sav_arr).astype(np.int64),
+    })
 
-⚠️ Dette er **ikke en offisiell NAV-beregning**, men gir god indikasjon på **retning og størrelsesorden** mellom ulike valg.
-""")
 
-# -------- Input (sidebar) --------
+def main() -> None:
+    """Bygger Streamlit-appen: input i sidebaren, beregning og resultattabell."""
 
-with st.sidebar:
-    st.header("📥 Input")
+    st.set_page_config(page_title="Pensjonssimulator – POC", layout="wide")
 
-    current_age = st.number_input("Alder i dag", value=36, min_value=18, max_value=70)
+    st.title("🧮 Pensjonssimulator – POC")
 
-    # Fødselsår (beregnet grovt: inneværende år - alder)
-    current_year = datetime.date.today().year
-    birth_year_default = current_year - current_age
-    birth_year = st.number_input(
-        "Fødselsår", value=birth_year_default, min_value=1900, max_value=current_year
-    )
+    st.markdown("""
+    En **forenklet** modell for å se hvordan:
+    - lønn i G  
+    - hvor lenge du jobber  
+    - årlig sparing og avkastning  
 
-    current_folketrygd_balance = st.number_input(
-        "Folketrygd-beholdning (NAV)", value=1_697_820, step=50_000, min_value=0
-    )
-    current_otp_balance = st.number_input(
-        "OTP-beholdning (valgfritt)", value=0, step=10_000, min_value=0
-    )
-    current_savings = st.number_input(
-        "Dagens sparing (fond + bank)", value=660_000, step=10_000, min_value=0
-    )
+    …påvirker pensjon ved ulike aldre.
 
-    annual_savings = st.number_input(
-        "Årlig egen sparing", value=120_000, step=10_000, min_value=0
-    )
-    annual_rental_savings = st.number_input(
-        "Leieinntekt som spares per år", value=0, step=10_000, min_value=0
-    )
+    🔎 Modellen bruker:
+    - NAV-lignende opptjening i folketrygden (18 % opp til 7,1 G)
+    - NAV-lignende **levealdersjustering** med delingsfaktor ved 62–67 år
+    - Forenklet modell for 68–75 år
+    - Forenklet modell for OTP og egen sparing
 
-    g_amount = st.number_input(
-        "G-beløp", value=124_028, step=1_000, min_value=1
-    )
-    salary_in_g = st.slider("Lønn i G", 3.0, 12.0, 7.1, 0.1)
+    ⚠️ Dette er **ikke en offisiell NAV-beregning**, men gir god indikasjon på **retning og størrelsesorden** mellom ulike valg.
+    """)
 
-    work_until_age_default = max(55, int(current_age))
-    work_until_age = st.slider("Jobber til alder", current_age, 75, work_until_age_default)
-    life_expectancy = st.slider("Forventet levealder", 80, 100, 90)
+    # -------- Input (sidebar) --------
 
-    st.subheader("Avanserte parametere")
-    state_accrual_rate = st.number_input(
-        "Folketrygd-opptjening (andel av lønn opp til 7,1 G)",
-        value=0.18,
-        step=0.01,
-    )
-    otp_below_rate = st.number_input("OTP-sats 0–7,1 G", value=0.07, step=0.01)
-    otp_above_rate = st.number_input("OTP-sats over 7,1 G", value=0.18, step=0.01)
-    folketrygd_growth = st.number_input(
-        "Årlig vekst folketrygd (regulering)",
-        value=0.02,
-        step=0.005,
-        format="%.3f",
-    )
-    otp_growth = st.number_input(
-        "Årlig vekst tjenestepensjon (OTP)",
-        value=0.04,
-        step=0.005,
-        format="%.3f",
-    )
-    savings_growth = st.number_input(
-        "Årlig avkastning egen sparing",
-        value=0.05,
-        step=0.005,
-        format="%.3f",
-    )
+    with st.sidebar:
+        st.header("📥 Input")
 
-    pension_ages = st.multiselect(
-        "Vis pensjon for følgende aldre",
-        options=[55, 62, 65, 67, 70],
-        default=[62, 67, 70],
-        help="NAV gir alderspensjon fra 62 år. For aldre under 62 år i tabellen vil folketrygd-delen være forenklet/teoretisk.",
-    )
+        current_age = st.number_input("Alder i dag", value=36, min_value=18, max_value=70)
 
-# Validate pension_ages
-if not pension_ages:
-    st.warning("⚠️ Velg minst én pensjonsalder fra listen over.")
-    st.stop()
-
-try:
-    inputs = PensionInputs(
-        current_age=int(current_age),
-        birth_year=int(birth_year),
-        current_folketrygd_balance=float(current_folketrygd_balance),
-        current_otp_balance=float(current_otp_balance),
-        current_savings=float(current_savings),
-        annual_savings=float(annual_savings),
-        annual_rental_savings=float(annual_rental_savings),
-        g_amount=float(g_amount),
-        salary_in_g=float(salary_in_g),
-        state_accrual_rate=float(state_accrual_rate),
-        otp_below_rate=float(otp_below_rate),
-        otp_above_rate=float(otp_above_rate),
-        folketrygd_growth=float(folketrygd_growth),
-        otp_growth=float(otp_growth),
-        savings_growth=float(savings_growth),
-        life_expectancy=int(life_expectancy),
-    )
-except (ValueError, TypeError) as e:
-    st.error(f"❌ Ugyldig input: {e}")
-    st.stop()
+        # Fødselsår (beregnet grovt: inneværende år - alder)
+        current_year = datetime.date.today().year
+        birth_year_default = current_year - current_age
+        birth_year = st.number_input(
+            "Fødselsår", value=birth_year_default, min_value=1900, max_value=current_year
+        )
 
-# -------- Beregning --------
+        current_folketrygd_balance = st.number_input(
+            "Folketrygd-beholdning (NAV)", value=1_697_820, step=50_000, min_value=0
+        )
+        current_otp_balance = st.number_input(
+            "OTP-beholdning (valgfritt)", value=0, step=10_000, min_value=0
+        )
+        current_savings = st.number_input(
+            "Dagens sparing (fond + bank)", value=660_000, step=10_000, min_value=0
+        )
 
-rows = []
+        annual_savings = st.number_input(
+            "Årlig egen sparing", value=120_000, step=10_000, min_value=0
+        )
+        annual_rental_savings = st.number_input(
+            "Leieinntekt som spares per år", value=0, step=10_000, min_value=0
+        )
 
-for pa in pension_ages:
-    try:
-        folketrygd, otp, savings = simulate_until_pension_age(
-            inputs=inputs,
-            work_until_age=int(work_until_age),
-            pension_age=int(pa),
+        g_amount = st.number_input(
+            "G-beløp", value=124_028, step=1_000, min_value=1
         )
+        salary_in_g = st.slider("Lønn i G", 3.0, 12.0, 7.1, 0.1)
 
-        annual_nav = annual_pension_from_balance(
-            balance=folketrygd,
-            pension_age=int(pa),
-            birth_year=int(birth_year),
-            life_expectancy=int(life_expectancy),
-            use_nav_style=True,
+        work_until_age_default = max(55, int(current_age))
+        work_until_age = st.slider("Jobber til alder", current_age, 75, work_until_age_default)
+        life_expectancy = st.slider("Forventet levealder", 80, 100, 90)
+
+        st.subheader("Avanserte parametere")
+        state_accrual_rate = st.number_input(
+            "Folketrygd-opptjening (andel av lønn opp til 7,1 G)",
+            value=0.18,
+            step=0.01,
+        )
+        otp_below_rate = st.number_input("OTP-sats 0–7,1 G", value=0.07, step=0.01)
+        otp_above_rate = st.number_input("OTP-sats over 7,1 G", value=0.18, step=0.01)
+        folketrygd_growth = st.number_input(
+            "Årlig vekst folketrygd (regulering)",
+            value=0.02,
+            step=0.005,
+            format="%.3f",
+        )
+        otp_growth = st.number_input(
+            "Årlig vekst tjenestepensjon (OTP)",
+            value=0.04,
+            step=0.005,
+            format="%.3f",
         )
-        annual_otp = annual_pension_from_balance(
-            balance=otp,
-            pension_age=int(pa),
-            birth_year=int(birth_year),
-            life_expectancy=int(life_expectancy),
-            use_nav_style=False,  # OTP er ikke NAV, så vi bruker enkel modell
+        savings_growth = st.number_input(
+            "Årlig avkastning egen sparing",
+            value=0.05,
+            step=0.005,
+            format="%.3f",
         )
-        annual_sav = annual_pension_from_balance(
-            balance=savings,
-            pension_age=int(pa),
-            birth_year=int(birth_year),
-            life_expectancy=int(life_expectancy),
-            use_nav_style=False,
+
+        pension_ages = st.multiselect(
+            "Vis pensjon for følgende aldre",
+            options=[55, 62, 65, 67, 70],
+            default=[62, 67, 70],
+            help="NAV gir alderspensjon fra 62 år. For aldre under 62 år i tabellen vil folketrygd-delen være forenklet/teoretisk.",
         )
 
-        rows.append({
-            "Pensjonsalder": pa,
-            "Jobber til": work_until_age,
-            "Lønn i G": salary_in_g,
-            "Årlig NAV (modell m/levealdersjustering)": round(annual_nav),
-            "Årlig OTP (modell)": round(annual_otp),
-            "Årlig fra sparing": round(annual_sav),
-            "SUM årlig (modell)": round(annual_nav + annual_otp + annual_sav),
-        })
-    except Exception as e:
-        st.error(f"❌ Beregningsfeil for pensjonsalder {pa}: {e}")
-        continue
-
-df = pd.DataFrame(rows)
-
-st.subheader("📈 Resultater – grunnscenario")
-st.dataframe(df, use_container_width=True)
-
-st.markdown("""
-💡 **Tolkning:**
-
-- NAV-delen (folketrygd) bruker delingsfaktor (levealdersjustering) fra 62 år og opp.
-- OTP og egen sparing bruker en enklere "levetid / antall år som pensjonist"-modell.
-- For tidlige aldre (f.eks. 55) er folketrygd-delen mer teoretisk i denne POC-en – du kan uansett ikke ta ut NAV-pensjon før 62.
-- Modellen er best egnet til å sammenligne **scenarier**: 6 G vs 7,1 G, jobbe til 55 vs 67, med/uten ekstra sparing osv.
-""")
+    # Validate pension_ages
+    if not pension_ages:
+        st.warning("⚠️ Velg minst én pensjonsalder fra listen over.")
+        st.stop()
+
+    # Nøkkel for råverdiene fra sidebaren. Er den uendret siden forrige omkjøring,
+    # gjenbrukes forrige resultat uten å bygge og validere PensionInputs på nytt.
+    input_key = (
+        int(current_age),
+        int(birth_year),
+        float(current_folketrygd_balance),
+        float(current_otp_balance),
+        float(current_savings),
+        float(annual_savings),
+        float(annual_rental_savings),
+        float(g_amount),
+        float(salary_in_g),
+        float(state_accrual_rate),
+        float(otp_below_rate),
+        float(otp_above_rate),
+        float(folketrygd_growth),
+        float(otp_growth),
+        float(savings_growth),
+        int(life_expectancy),
+        int(work_until_age),
+        tuple(sorted(int(pa) for pa in pension_ages)),
+    )
+
+    if st.session_state.get("_last_key") == input_key and "_last_df" in st.session_state:
+        df = st.session_state["_last_df"]
+        age_errors = st.session_state["_last_age_errors"]
+    else:
+        try:
+            inputs = PensionInputs(
+                current_age=int(current_age),
+                birth_year=int(birth_year),
+                current_folketrygd_balance=float(current_folketrygd_balance),
+                current_otp_balance=float(current_otp_balance),
+                current_savings=float(current_savings),
+                annual_savings=float(annual_savings),
+                annual_rental_savings=float(annual_rental_savings),
+                g_amount=float(g_amount),
+                salary_in_g=float(salary_in_g),
+                state_accrual_rate=float(state_accrual_rate),
+                otp_below_rate=float(otp_below_rate),
+                otp_above_rate=float(otp_above_rate),
+                folketrygd_growth=float(folketrygd_growth),
+                otp_growth=float(otp_growth),
+                savings_growth=float(savings_growth),
+                life_expectancy=int(life_expectancy),
+            )
+        except (ValueError, TypeError) as e:
+            st.error(f"❌ Ugyldig input: {e}")
+            st.stop()
+
+        # -------- Beregning --------
+
+        # Ugyldige pensjonsaldre rapporteres enkeltvis, resten simuleres samlet
+        age_errors = []
+        valid_pension_ages = []
+        for pa in sorted(pension_ages):
+            try:
+                validate_pension_age(inputs, int(pa))
+            except ValueError as e:
+                age_errors.append(f"❌ Beregningsfeil for pensjonsalder {pa}: {e}")
+                continue
+            valid_pension_ages.append(int(pa))
+
+        try:
+            df = compute_results(inputs, int(work_until_age), tuple(valid_pension_ages))
+        except Exception as e:
+            st.error(f"❌ Beregningsfeil: {e}")
+            st.stop()
+
+        st.session_state["_last_key"] = input_key
+        st.session_state["_last_df"] = df
+        st.session_state["_last_age_errors"] = age_errors
+
+    for message in age_errors:
+        st.error(message)
+
+    st.subheader("📈 Resultater – grunnscenario")
+    st.dataframe(df, use_container_width=True)
+
+    st.markdown("""
+    💡 **Tolkning:**
+
+    - NAV-delen (folketrygd) bruker delingsfaktor (levealdersjustering) fra 62 år og opp.
+    - OTP og egen sparing bruker en enklere "levetid / antall år som pensjonist"-modell.
+    - For tidlige aldre (f.eks. 55) er folketrygd-delen mer teoretisk i denne POC-en – du kan uansett ikke ta ut NAV-pensjon før 62.
+    - Modellen er best egnet til å sammenligne **scenarier**: 6 G vs 7,1 G, jobbe til 55 vs 67, med/uten ekstra sparing osv.
+    """)
+
+
+if __name__ == "__main__":
+    main()
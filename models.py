@@ -2,7 +2,7 @@ import datetime
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class PensionInputs:
     """
     Input parameters for Norwegian pension calculations.
@@ -11,6 +11,9 @@ class PensionInputs:
     accumulation across three components: Folketrygd (state pension),
     OTP (occupational pension), and personal savings.
 
+    Instances are immutable and hashable, so they can be used directly as
+    cache keys.
+
     Attributes:
         current_age: Current age of the person (years)
         birth_year: Year of birth
@@ -1,4 +1,7 @@
-from typing import Dict, Tuple
+import math
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
 
 from models import PensionInputs
 
@@ -23,6 +26,36 @@ DELINGSFAKTOR_1963: Dict[int, float] = {
 }
 
 
+def _build_delingsfaktor_table() -> np.ndarray:
+    """
+    Bygger oppslagstabell for NAV-lignende delingsfaktor, indeksert på alder (0–75).
+
+    - For 62–67 år brukes tabellverdier fra 1963-kullet.
+    - For 68–75 år antar vi at delingstallet synker omtrent 0.9 per år etter 67.
+    - Øvrige aldre er NaN og faller tilbake til (life_expectancy - age)-modellen ved oppslag.
+    """
+
+    table = np.full(MAX_NAV_PENSION_AGE + 1, np.nan)
+
+    for age, factor in DELINGSFAKTOR_1963.items():
+        table[age] = factor
+
+    # Grovt anslag: ta utgangspunkt i 67-års delingsfaktor og reduser med ca. 0.9 per år.
+    base67 = DELINGSFAKTOR_1963[STANDARD_PENSION_AGE]
+    for age in range(STANDARD_PENSION_AGE + 1, MAX_NAV_PENSION_AGE + 1):
+        adjustment = ANNUAL_DIVISOR_REDUCTION * (age - STANDARD_PENSION_AGE)
+        table[age] = max(1.0, base67 - adjustment)
+
+    return table
+
+
+# Delingsfaktor per alder (0–75), NaN der enkel levetidsmodell skal brukes
+DELINGSFAKTOR_BY_AGE: np.ndarray = _build_delingsfaktor_table()
+
+# Forhåndsberegnet 1 / delingsfaktor, slik at batch-beregning ganger i stedet for å dele
+_RECIP_DELINGSFAKTOR_BY_AGE: np.ndarray = 1.0 / DELINGSFAKTOR_BY_AGE
+
+
 def get_delingsfaktor_nav(pension_age: int, birth_year: int, life_expectancy: int) -> float:
     """
     Forenklet NAV-lignende delingsfaktor:
@@ -35,24 +68,92 @@ def get_delingsfaktor_nav(pension_age: int, birth_year: int, life_expectancy: in
       så denne modellen er litt optimistisk for folketrygden – men god til å sammenligne scenarier.
     """
 
-    # NAV: alderspensjon fra 62–75 år
-    if MIN_NAV_PENSION_AGE <= pension_age <= STANDARD_PENSION_AGE:
-        base = DELINGSFAKTOR_1963.get(pension_age)
-        if base is not None:
-            return base
+    # NAV: alderspensjon fra 62–75 år (forhåndsberegnet i DELINGSFAKTOR_BY_AGE for hele år)
+    if float(pension_age).is_integer() and 0 <= pension_age <= MAX_NAV_PENSION_AGE:
+        factor = DELINGSFAKTOR_BY_AGE[int(pension_age)]
+        if not math.isnan(factor):
+            return float(factor)
 
     if STANDARD_PENSION_AGE + 1 <= pension_age <= MAX_NAV_PENSION_AGE:
-        # Grovt anslag: ta utgangspunkt i 67-års delingsfaktor og reduser med ca. 0.9 per år.
+        # Alder mellom hele år: samme grove anslag som tabellen er bygget fra.
         base67 = DELINGSFAKTOR_1963[STANDARD_PENSION_AGE]
         adjustment = ANNUAL_DIVISOR_REDUCTION * (pension_age - STANDARD_PENSION_AGE)
-        approx = max(1.0, base67 - adjustment)
-        return approx
+        return max(1.0, base67 - adjustment)
 
     # For alle andre aldre (f.eks. 55 i din app): bruk enkel lineær modell
     years = max(1, life_expectancy - pension_age)
     return float(years)
 
 
+def get_delingsfaktor_array(pension_ages: np.ndarray, life_expectancy: int) -> np.ndarray:
+    """
+    Vektorisert variant av get_delingsfaktor_nav for flere pensjonsaldre samtidig.
+
+    Returnerer delingsfaktor per element i pension_ages.
+    """
+
+    ages = np.asarray(pension_ages, dtype=float)
+
+    # Tabelloppslag kun for hele år, som i get_delingsfaktor_nav
+    whole = (ages == np.floor(ages)) & (ages >= 0) & (ages <= MAX_NAV_PENSION_AGE)
+    factors = np.full(ages.shape, np.nan)
+    factors[whole] = DELINGSFAKTOR_BY_AGE[ages[whole].astype(np.int64)]
+
+    # Alder mellom hele år i 68–75: samme grove anslag som tabellen er bygget fra.
+    between = ~whole & (ages >= STANDARD_PENSION_AGE + 1) & (ages <= MAX_NAV_PENSION_AGE)
+    base67 = DELINGSFAKTOR_1963[STANDARD_PENSION_AGE]
+    factors[between] = np.maximum(
+        1.0, base67 - ANNUAL_DIVISOR_REDUCTION * (ages[between] - STANDARD_PENSION_AGE)
+    )
+
+    fallback = np.maximum(1, life_expectancy - ages)
+
+    return np.where(np.isnan(factors), fallback, factors)
+
+
+def _future_value(
+    balance: float,
+    contribution: float,
+    growth: float,
+    n_work: int,
+    n_idle: int,
+) -> float:
+    """
+    Lukket form for årlig opptjening + avkastning.
+
+    Tilsvarer å legge til `contribution` i starten av hvert av de `n_work` første
+    årene og deretter gi avkastning `growth` hvert år, etterfulgt av `n_idle` år
+    med kun avkastning (forskuddsannuitet).
+    """
+
+    factor = 1 + growth
+    growth_work = factor ** n_work
+    if growth == 0:
+        accrued = contribution * n_work
+    else:
+        accrued = contribution * factor * (growth_work - 1) / growth
+
+    return (float(balance) * growth_work + accrued) * factor ** n_idle
+
+
+def validate_pension_age(inputs: PensionInputs, pension_age: int) -> None:
+    """
+    Sjekker at pensjonsalderen kan simuleres for de gitte inputene.
+
+    Raises:
+        ValueError: If pension_age is not greater than current_age or exceeds life_expectancy
+    """
+
+    if pension_age <= inputs.current_age:
+        raise ValueError(
+            f"pension_age ({pension_age}) must be greater than current_age ({inputs.current_age})"
+        )
+    if pension_age > inputs.life_expectancy:
+        raise ValueError(
+            f"pension_age ({pension_age}) cannot exceed life_expectancy ({inputs.life_expectancy})"
+        )
+
+
 def simulate_until_pension_age(
     inputs: PensionInputs,
     work_until_age: int,
@@ -71,43 +172,69 @@ def simulate_until_pension_age(
         ValueError: If pension_age is not greater than current_age
     """
 
-    # Validate inputs
-    if pension_age <= inputs.current_age:
-        raise ValueError(
-            f"pension_age ({pension_age}) must be greater than current_age ({inputs.current_age})"
-        )
-    if pension_age > inputs.life_expectancy:
-        raise ValueError(
-            f"pension_age ({pension_age}) cannot exceed life_expectancy ({inputs.life_expectancy})"
-        )
+    return simulate_multi(inputs, work_until_age, [pension_age])[pension_age]
+
+
+def simulate_multi(
+    inputs: PensionInputs,
+    work_until_age: int,
+    pension_ages: Iterable[int],
+) -> Dict[int, Tuple[float, float, float]]:
+    """
+    Som simulate_until_pension_age, men for flere pensjonsaldre i én gjennomkjøring.
+
+    Beholdningene fremskrives fra én pensjonsalder til den neste, slik at
+    felles år kun beregnes én gang.
+
+    Returnerer beholdning per pensjonsalder:
+        {pension_age: (folketrygd, otp, savings)}
+
+    Raises:
+        ValueError: If any pension_age is not greater than current_age or exceeds life_expectancy
+    """
+
+    ages = sorted(set(pension_ages))
+    for pension_age in ages:
+        validate_pension_age(inputs, pension_age)
+
+    # Løkkeinvarianter: slå opp attributter og beregn årlige innskudd én gang
+    g_amount = inputs.g_amount
+    folketrygd_growth = inputs.folketrygd_growth
+    otp_growth = inputs.otp_growth
+    savings_growth = inputs.savings_growth
+
+    # Folketrygd-opptjening (ny modell: 18,1 % av pensjonsgivende inntekt opp til 7,1 G – her forenklet til state_accrual_rate)
+    salary = g_amount * inputs.salary_in_g
+    cap_salary = min(salary, g_amount * SALARY_CAP_IN_G)
+    folketrygd_contrib = cap_salary * inputs.state_accrual_rate
+
+    # OTP-opptjening (typisk 7 % opp til 7,1 G, opptil 18 % over)
+    above_cap = max(0.0, salary - cap_salary)
+    otp_contrib = cap_salary * inputs.otp_below_rate + above_cap * inputs.otp_above_rate
+
+    # Egen sparing (inkl. leieinntekter som pløyes rett inn)
+    savings_contrib = inputs.annual_savings + inputs.annual_rental_savings
 
     folketrygd = float(inputs.current_folketrygd_balance)
     otp = float(inputs.current_otp_balance)
     savings = float(inputs.current_savings)
 
-    for age in range(inputs.current_age, pension_age):
-        salary = inputs.g_amount * inputs.salary_in_g
-        is_working = age < work_until_age
-
-        if is_working:
-            # Folketrygd-opptjening (ny modell: 18,1 % av pensjonsgivende inntekt opp til 7,1 G – her forenklet til state_accrual_rate)
-            cap_salary = min(salary, inputs.g_amount * SALARY_CAP_IN_G)
-            folketrygd += cap_salary * inputs.state_accrual_rate
+    snapshots: Dict[int, Tuple[float, float, float]] = {}
+    age = inputs.current_age
 
-            # OTP-opptjening (typisk 7 % opp til 7,1 G, opptil 18 % over)
-            below_cap = cap_salary
-            above_cap = max(0.0, salary - cap_salary)
-            otp += below_cap * inputs.otp_below_rate + above_cap * inputs.otp_above_rate
+    for pension_age in ages:
+        # Antall år med opptjening/sparing, og antall år med kun avkastning
+        n_work = max(0, min(pension_age, work_until_age) - age)
+        n_idle = pension_age - age - n_work
 
-            # Egen sparing (inkl. leieinntekter som pløyes rett inn)
-            savings += inputs.annual_savings + inputs.annual_rental_savings
+        folketrygd = _future_value(folketrygd, folketrygd_contrib, folketrygd_growth, n_work, n_idle)
+        otp = _future_value(otp, otp_contrib, otp_growth, n_work, n_idle)
+        savings = _future_value(savings, savings_contrib, savings_growth, n_work, n_idle)
 
-        # Årlig regulering/avkastning
-        folketrygd *= (1 + inputs.folketrygd_growth)
-        otp *= (1 + inputs.otp_growth)
-        savings *= (1 + inputs.savings_growth)
+        snapshots[pension_age] = (folketrygd, otp, savings)
+        age = pension_age
 
-    return folketrygd, otp, savings
+    return snapshots
 
 
 def annual_pension_from_balance(
@@ -136,3 +263,38 @@ def annual_pension_from_balance(
         divisor = float(years)
 
     return balance / divisor
+
+
+def annual_pension_batch(
+    balances: np.ndarray,
+    pension_ages: np.ndarray,
+    life_expectancy: int,
+    use_nav_style: bool = True,
+) -> np.ndarray:
+    """
+    Vektorisert variant av annual_pension_from_balance for flere pensjonsaldre.
+
+    balances og pension_ages må ha samme lengde; element i gir årlig pensjon
+    for balances[i] ved pension_ages[i].
+    """
+
+    balances = np.asarray(balances, dtype=float)
+    ages = np.asarray(pension_ages, dtype=float)
+
+    if use_nav_style:
+        # Tabelloppslag for hele år i 62–75; ellers delingsfaktor som i get_delingsfaktor_nav
+        recip = np.full(ages.shape, np.nan)
+        whole = (ages == np.floor(ages)) & (ages >= MIN_NAV_PENSION_AGE) & (ages <= MAX_NAV_PENSION_AGE)
+        recip[whole] = _RECIP_DELINGSFAKTOR_BY_AGE[ages[whole].astype(np.int64)]
+
+        # Deler kun for elementene som ikke dekkes av den forhåndsberegnede tabellen
+        rest = ~whole
+        recip[rest] = 1.0 / np.where(
+            ages[rest] >= MIN_NAV_PENSION_AGE,
+            get_delingsfaktor_array(ages[rest], life_expectancy),
+            np.maximum(1, life_expectancy - ages[rest]),
+        )
+    else:
+        recip = 1.0 / np.maximum(1, life_expectancy - ages)
+
+    return np.where(balances > 0, balances * recip, 0.0)